@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from dataclasses import dataclass
 from typing import Optional
 from enum import Enum
 
@@ -7,33 +8,28 @@ class StorageType(Enum):
     LOCAL = "local"
     S3 = "s3"
 
+@dataclass(frozen=True, slots=True)
 class StorageConfig:
-    def __init__(self):
-        self.storage_type = StorageType(os.getenv("STORAGE_TYPE", "local"))
-        
-        # Local storage configuration
-        self.local_upload_dir = Path(os.getenv("LOCAL_UPLOAD_DIR", "uploads"))
-        self.auto_delete_hours = int(os.getenv("AUTO_DELETE_HOURS", "24"))
-        
-        # S3 configuration (for production)
-        self.s3_bucket_name = os.getenv("S3_BUCKET_NAME")
-        self.s3_region = os.getenv("S3_REGION", "us-east-1")
-        self.aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
-        self.aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-        
-        # Ensure local directory exists
-        if self.storage_type == StorageType.LOCAL:
-            self.local_upload_dir.mkdir(exist_ok=True)
-    
+    """Immutable storage settings, read from the environment once at import"""
+    storage_type: StorageType
+    local_upload_dir: Path
+    auto_delete_hours: int
+    # "blake3" (default, when installed) or "sha256" for compliance setups
+    file_hash_algorithm: str
+    s3_bucket_name: Optional[str]
+    s3_region: str
+    aws_access_key_id: Optional[str]
+    aws_secret_access_key: Optional[str]
+
     def is_local_storage(self) -> bool:
-        return self.storage_type == StorageType.LOCAL
-    
+        return self.storage_type is StorageType.LOCAL
+
     def is_s3_storage(self) -> bool:
-        return self.storage_type == StorageType.S3
-    
+        return self.storage_type is StorageType.S3
+
     def validate_s3_config(self) -> bool:
         """Validate that all required S3 configuration is present"""
-        if self.storage_type == StorageType.S3:
+        if self.storage_type is StorageType.S3:
             return all([
                 self.s3_bucket_name,
                 self.aws_access_key_id,
@@ -41,5 +37,24 @@ class StorageConfig:
             ])
         return True
 
+def _load_config() -> StorageConfig:
+    """Build the config from environment variables"""
+    config = StorageConfig(
+        storage_type=StorageType(os.getenv("STORAGE_TYPE", "local")),
+        local_upload_dir=Path(os.getenv("LOCAL_UPLOAD_DIR", "uploads")),
+        auto_delete_hours=int(os.getenv("AUTO_DELETE_HOURS", "24")),
+        file_hash_algorithm=os.getenv("FILE_HASH_ALGORITHM", "blake3"),
+        s3_bucket_name=os.getenv("S3_BUCKET_NAME"),
+        s3_region=os.getenv("S3_REGION", "us-east-1"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
+    )
+
+    # Ensure local directory exists
+    if config.is_local_storage():
+        config.local_upload_dir.mkdir(exist_ok=True)
+
+    return config
+
 # Global storage configuration instance
-storage_config = StorageConfig()
\ No newline at end of file
+storage_config = _load_config()
@@ -7,49 +7,67 @@ from pathlib import Path
 import tempfile
 import shutil
 from typing import Optional, Dict, Any
-import io
+import aiofiles
 import asyncio
 import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
 
-from services.geometry_parser import GeometryParser
-from services.file_converter import FileConverter
-from services.storage_service import storage_service
+from services.geometry_parser import GeometryParser, analyze_file_worker
+from services.file_converter import FileConverter, convert_to_stl_worker
+from services.storage_service import storage_service, hash_file
 from models.response_models import GeometryAnalysis, FileInfo
 from config.storage import storage_config
 
 logger = logging.getLogger(__name__)
 
+# Background tasks are held in a module-level set so the event loop never
+# garbage-collects them mid-flight; finished tasks discard themselves
+_BG_TASKS: set = set()
+_cleanup_stop = asyncio.Event()
+
 # Background task for cleaning up old files
 async def cleanup_task():
     """Background task to clean up old files periodically"""
-    while True:
+    while not _cleanup_stop.is_set():
         try:
             await storage_service.cleanup_old_files()
-            # Run cleanup every hour
-            await asyncio.sleep(3600)
+            # Temp-dir scan is synchronous filesystem work; keep it off the loop
+            await asyncio.to_thread(file_converter.cleanup_temp_files)
         except Exception as e:
             print(f"Error in cleanup task: {e}")
-            await asyncio.sleep(3600)
+        # Wait for the next hourly run, waking immediately on shutdown
+        try:
+            await asyncio.wait_for(_cleanup_stop.wait(), timeout=3600)
+        except asyncio.TimeoutError:
+            continue
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan"""
     # Startup
     cleanup_task_handle = asyncio.create_task(cleanup_task())
+    _BG_TASKS.add(cleanup_task_handle)
+    cleanup_task_handle.add_done_callback(_BG_TASKS.discard)
+    # Worker processes for CPU-bound mesh work: trimesh's pure-Python hot
+    # spots hold the GIL, so threads don't scale past one core. forkserver
+    # avoids forking the full server process per worker.
+    app.state.mesh_pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=mp.get_context("forkserver")
+    )
     print(f"Storage configured: {storage_config.storage_type.value}")
     if storage_config.is_local_storage():
         print(f"Local storage directory: {storage_config.local_upload_dir}")
         print(f"Auto-delete after: {storage_config.auto_delete_hours} hours")
-    
+
     yield
-    
-    # Shutdown
-    cleanup_task_handle.cancel()
-    try:
-        await cleanup_task_handle
-    except asyncio.CancelledError:
-        pass
+
+    # Shutdown: signal the cleanup loop instead of cancelling it mid-run
+    _cleanup_stop.set()
+    await cleanup_task_handle
+    app.state.mesh_pool.shutdown()
 
 app = FastAPI(
     title="3D Quote API",
@@ -76,6 +94,41 @@ file_converter = FileConverter()
 UPLOAD_DIR = storage_config.local_upload_dir if storage_config.is_local_storage() else Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Extensions accepted by /upload, and the subset that needs STL conversion
+# for the frontend viewer
+ALLOWED_EXTENSIONS = frozenset({".stl", ".obj", ".step", ".stp", ".iges", ".igs", ".3mf"})
+CONVERTIBLE_EXTENSIONS = frozenset({".step", ".stp", ".iges", ".igs", ".3mf"})
+
+# Pricing tables for /quote, hoisted to module scope so the endpoint does
+# a single lookup instead of rebuilding dicts per request
+MATERIAL_COSTS = {
+    "pla": 0.05,  # per cm³
+    "abs": 0.07,
+    "petg": 0.08,
+    "nylon": 0.12,
+    "resin": 0.15
+}
+
+PROCESS_MULTIPLIERS = {
+    "fdm": 1.0,
+    "sla": 1.5,
+    "dmls": 3.0,
+    "mjf": 2.0
+}
+
+DEFAULT_MATERIAL_COST = 0.1
+DEFAULT_PROCESS_MULTIPLIER = 1.0
+
+# Precomputed per-cm³ unit cost for every known (material, process) pair
+_UNIT_COST = {
+    (material, process): cost * multiplier
+    for material, cost in MATERIAL_COSTS.items()
+    for process, multiplier in PROCESS_MULTIPLIERS.items()
+}
+
+SETUP_FEE = 10.0
+HANDLING_FEE = 5.0
+
 @app.get("/")
 async def root():
     return {"message": "3D Quote API is running"}
@@ -84,6 +137,17 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+def _sendfile_copy(src_fd: int, dst_fd: int) -> int:
+    """Copy a whole file between descriptors in-kernel; returns bytes copied"""
+    total = os.fstat(src_fd).st_size
+    offset = 0
+    while offset < total:
+        sent = os.sendfile(dst_fd, src_fd, offset, total - offset)
+        if sent == 0:
+            break
+        offset += sent
+    return offset
+
 @app.post("/upload", response_model=Dict[str, Any])
 async def upload_file(file: UploadFile = File(...), session_id: Optional[str] = None):
     """
@@ -91,67 +155,129 @@ async def upload_file(file: UploadFile = File(...), session_id: Optional[str] =
     """
     try:
         # Validate file type
-        allowed_extensions = {".stl", ".obj", ".step", ".stp", ".iges", ".igs", ".3mf"}
         file_extension = Path(file.filename).suffix.lower()
-        
-        if file_extension not in allowed_extensions:
+
+        if file_extension not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Unsupported file type: {file_extension}"
             )
         
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-        
-        # Check for duplicates and save file using storage service
-        file_stream = io.BytesIO(content)
-        
-        if session_id:
-            # Use duplicate detection if session_id is provided
-            is_duplicate_hash, is_same_name_different_content, stored_filename, access_url, file_hash = await storage_service.save_file_with_duplicate_check(
-                file_stream, file.filename, session_id
-            )
-            
-            if is_duplicate_hash:
-                raise HTTPException(
-                    status_code=409,
-                    detail="This file already exists in your cart"
-                )
-            
-            if is_same_name_different_content:
-                raise HTTPException(
-                    status_code=409,
-                    detail=f"A different file with the name '{file.filename}' is already in your cart. Please rename this file to add it."
-                )
-        else:
-            # No session tracking, save normally
-            stored_filename, access_url, file_hash = await storage_service.save_file(file_stream, file.filename)
-        
-        # Save uploaded file temporarily for processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-        
+        # Stream the upload to a temp file so large models never need to fit
+        # in memory, then hash via mmap of the written file
+        file_size = 0
+        tmp_fd, tmp_file_path = tempfile.mkstemp(suffix=file_extension)
+        # The finally below covers the whole life of the temp file — a
+        # failure in the copy or the hash must not leak it, since nothing
+        # sweeps the system temp dir
         try:
-            # Parse geometry
-            analysis = await geometry_parser.analyze_file(tmp_file_path, file.filename)
-            
-            # Convert file if needed for frontend display
+            # Large uploads are already spooled to disk by Starlette; copy
+            # those in-kernel with sendfile instead of moving bytes through
+            # userspace. (fileno() would force small in-memory uploads to
+            # roll over to disk, so only take this path once rolled.)
+            if hasattr(os, "sendfile") and getattr(file.file, "_rolled", False):
+                try:
+                    # The copy loop blocks, so run it in a worker thread to keep
+                    # the event loop turning while the kernel moves the bytes
+                    file_size = await asyncio.to_thread(_sendfile_copy, file.file.fileno(), tmp_fd)
+                finally:
+                    os.close(tmp_fd)
+            else:
+                # Small upload still in memory: stream in 1 MiB chunks with an
+                # async writer so the event loop is never blocked on disk I/O
+                os.close(tmp_fd)
+                async with aiofiles.open(tmp_file_path, 'wb') as tmp:
+                    while chunk := await file.read(1 << 20):
+                        await tmp.write(chunk)
+                        file_size += len(chunk)
+            # Hashing a large file stalls for as long as the digest takes, so it
+            # goes to a worker thread as well (mmap page faults + BLAKE3/SHA both
+            # release the GIL)
+            file_hash = await asyncio.to_thread(hash_file, tmp_file_path)
+            # Hashes stay raw bytes internally; hex only where a string is
+            # needed (converter cache filenames and the API response)
+            file_hash_hex = file_hash.hex()
+
+            # Check for duplicates and save file using storage service
+            if session_id:
+                # Use duplicate detection if session_id is provided
+                is_duplicate_hash, is_same_name_different_content, stored_filename, access_url = await storage_service.save_file_from_path_with_duplicate_check(
+                    tmp_file_path, file.filename, file_hash, session_id
+                )
+
+                if is_duplicate_hash:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="This file already exists in your cart"
+                    )
+
+                if is_same_name_different_content:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"A different file with the name '{file.filename}' is already in your cart. Please rename this file to add it."
+                    )
+            else:
+                # No session tracking, save normally
+                stored_filename, access_url = await storage_service.save_file_from_path(tmp_file_path, file.filename, file_hash)
+
+            # Cache lookups stay in-process; only misses are dispatched to the
+            # worker pool. Parse and conversion jobs run concurrently on
+            # separate cores — both only read the temp file.
+            loop = asyncio.get_running_loop()
+
+            analysis = geometry_parser.get_cached_analysis(file_hash)
+            if analysis is None:
+                # Fall back to the persisted analysis sidecar, which survives
+                # restarts and covers re-uploads from other sessions
+                persisted = storage_service.get_cached_analysis(file_hash)
+                if persisted is not None:
+                    analysis = GeometryAnalysis(**persisted)
+                    geometry_parser.cache_analysis(file_hash, analysis)
+            already_analyzed = analysis is not None
+
             converted_file_path = None
-            if file_extension in {".step", ".stp", ".iges", ".igs", ".3mf"}:
-                converted_file_path = await file_converter.convert_to_stl(tmp_file_path)
+            if file_extension in CONVERTIBLE_EXTENSIONS:
+                cached_stl = file_converter.get_cached_stl(file_hash_hex)
+                if cached_stl is not None:
+                    converted_file_path = str(cached_stl)
+
+            analyze_job = None
+            convert_job = None
+            if analysis is None:
+                analyze_job = loop.run_in_executor(
+                    app.state.mesh_pool, analyze_file_worker, tmp_file_path, file.filename
+                )
+            if file_extension in CONVERTIBLE_EXTENSIONS and converted_file_path is None:
+                convert_job = loop.run_in_executor(
+                    app.state.mesh_pool, convert_to_stl_worker, tmp_file_path, file_hash_hex
+                )
+
+            # Wait for every dispatched worker before the finally below can
+            # unlink the temp file they read; return_exceptions keeps one
+            # job's failure from abandoning the other mid-read. result()
+            # re-raises any stored exception afterwards.
+            jobs = [job for job in (analyze_job, convert_job) if job is not None]
+            if jobs:
+                await asyncio.gather(*jobs, return_exceptions=True)
+            if analyze_job is not None:
+                analysis = analyze_job.result()
+                geometry_parser.cache_analysis(file_hash, analysis)
+                await storage_service.store_analysis(file_hash, analysis.model_dump())
+            if convert_job is not None:
+                converted_file_path = convert_job.result()
+                if converted_file_path:
+                    file_converter.record_cached_stl(file_hash_hex, converted_file_path)
             
             # Prepare response
             response_data = {
-                "duplicate": False,
+                "duplicate": already_analyzed,
                 "file_info": {
                     "filename": file.filename,
                     "stored_filename": stored_filename,
                     "access_url": access_url,
                     "size": file_size,
                     "format": file_extension,
-                    "file_hash": file_hash,
+                    "file_hash": file_hash_hex,
                 },
                 "geometry_analysis": analysis,
                 "converted_file_url": f"/download/{Path(converted_file_path).name}" if converted_file_path else None
@@ -168,8 +294,7 @@ async def upload_file(file: UploadFile = File(...), session_id: Optional[str] =
             
         finally:
             # Clean up temporary processing file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+            Path(tmp_file_path).unlink(missing_ok=True)
                 
     except HTTPException:
         # Re-raise HTTP exceptions (like 409 for duplicates)
@@ -183,16 +308,12 @@ async def download_file(filename: str):
     """
     Download stored files
     """
-    if storage_config.is_local_storage():
-        file_path = await storage_service.get_file(filename)
-        if not file_path or not file_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
-        return FileResponse(file_path)
-    else:
-        # For S3 storage, redirect to the presigned URL
-        # This is a simplified approach - in production you might want to
-        # generate a new presigned URL or proxy the download
-        raise HTTPException(status_code=501, detail="Direct download not implemented for S3 storage")
+    # For S3 storage this downloads the object to a temp file first,
+    # using the same multipart transfer settings as uploads
+    file_path = await storage_service.get_file(filename)
+    if not file_path or not file_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(file_path)
 
 @app.post("/admin/cleanup")
 async def manual_cleanup():
@@ -280,36 +401,22 @@ async def calculate_quote(
     """
     try:
         # Simple pricing logic (to be expanded)
-        material_costs = {
-            "pla": 0.05,  # per cm³
-            "abs": 0.07,
-            "petg": 0.08,
-            "nylon": 0.12,
-            "resin": 0.15
-        }
-        
-        process_multipliers = {
-            "fdm": 1.0,
-            "sla": 1.5,
-            "dmls": 3.0,
-            "mjf": 2.0
-        }
-        
-        base_cost = volume * material_costs.get(material, 0.1)
-        process_cost = base_cost * process_multipliers.get(process, 1.0)
+        base_cost = volume * MATERIAL_COSTS.get(material, DEFAULT_MATERIAL_COST)
+
+        unit_cost = _UNIT_COST.get((material, process))
+        if unit_cost is None:
+            unit_cost = MATERIAL_COSTS.get(material, DEFAULT_MATERIAL_COST) * PROCESS_MULTIPLIERS.get(process, DEFAULT_PROCESS_MULTIPLIER)
+
+        process_cost = volume * unit_cost
         total_cost = process_cost * quantity
-        
-        # Add setup and handling fees
-        setup_fee = 10.0
-        handling_fee = 5.0
-        
-        final_cost = total_cost + setup_fee + handling_fee
-        
+
+        final_cost = total_cost + SETUP_FEE + HANDLING_FEE
+
         return {
             "material_cost": round(base_cost, 2),
             "process_cost": round(process_cost, 2),
-            "setup_fee": setup_fee,
-            "handling_fee": handling_fee,
+            "setup_fee": SETUP_FEE,
+            "handling_fee": HANDLING_FEE,
             "subtotal": round(total_cost, 2),
             "total": round(final_cost, 2),
             "quantity": quantity,
@@ -320,4 +427,19 @@ async def calculate_quote(
         raise HTTPException(status_code=500, detail=f"Error calculating quote: {str(e)}")
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # uvloop + httptools do socket I/O and HTTP parsing in C; both ship with
+    # uvicorn[standard]. Use --reload via the uvicorn CLI for development.
+    #
+    # Single worker on purpose: session duplicate tracking, its locks and
+    # the analysis caches are per-process, so multiple workers would miss
+    # 409s and race the persisted cache — and each worker would spawn its
+    # own full-size mesh pool. The pool already saturates the cores for
+    # the CPU-heavy work.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=1
+    )
\ No newline at end of file
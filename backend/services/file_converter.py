@@ -1,9 +1,45 @@
 import trimesh
+import numpy as np
 import tempfile
 import os
+import struct
 from pathlib import Path
 from typing import Optional, Dict, Any
 import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process-local converter used by pool workers, constructed lazily per process
+_worker_converter: Optional["FileConverter"] = None
+
+def convert_to_stl_worker(input_file_path: str, file_hash: Optional[str] = None) -> Optional[str]:
+    """Process-pool entry point: run an STL conversion in a worker process"""
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = FileConverter()
+    return _worker_converter.convert_to_stl(input_file_path, file_hash=file_hash)
+
+# Record layout of one binary-STL triangle: normal, three vertices, attribute
+_STL_RECORD_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2")
+])
+
+def _write_binary_stl(mesh: trimesh.Trimesh, output_path: Path) -> None:
+    """
+    Write a binary STL via one packed record array and a single tofile call,
+    instead of trimesh's per-triangle export loop
+    """
+    records = np.empty(len(mesh.faces), dtype=_STL_RECORD_DTYPE)
+    records["normal"] = mesh.face_normals
+    records["vertices"] = mesh.triangles
+    records["attributes"] = 0
+
+    with open(output_path, "wb") as fh:
+        fh.write(struct.pack("<80sI", b"3dquote binary STL", len(records)))
+        records.tofile(fh)
 
 class FileConverter:
     """
@@ -13,36 +49,63 @@ class FileConverter:
     def __init__(self):
         self.temp_dir = Path(tempfile.gettempdir()) / "3d_quote_conversions"
         self.temp_dir.mkdir(exist_ok=True)
-        
+
         # Supported input formats for conversion
         self.convertible_formats = {
             '.step', '.stp', '.iges', '.igs', '.3mf', '.obj', '.ply'
         }
+
+        # Converted STL output is a pure function of input bytes, so cache
+        # output paths keyed by content hash. Hash-keyed files are named
+        # <hash>.stl, which lets the cache survive restarts.
+        self._stl_cache: Dict[str, Path] = {
+            path.stem: path for path in self.temp_dir.glob("*.stl")
+        }
+
+    def get_cached_stl(self, file_hash: str) -> Optional[Path]:
+        """Return a previously converted STL for this content hash, if it still exists"""
+        cached = self._stl_cache.get(file_hash)
+        if cached is not None and cached.exists():
+            return cached
+        self._stl_cache.pop(file_hash, None)
+        return None
+
+    def record_cached_stl(self, file_hash: str, output_path) -> None:
+        """Record a conversion produced elsewhere (e.g. in a worker process)"""
+        self._stl_cache[file_hash] = Path(output_path)
     
-    async def convert_to_stl(self, input_file_path: str, output_dir: Optional[str] = None) -> Optional[str]:
+    def convert_to_stl(self, input_file_path: str, output_dir: Optional[str] = None, file_hash: Optional[str] = None) -> Optional[str]:
         """
         Convert various 3D formats to STL for frontend display
+
+        When file_hash is provided, identical inputs reuse the cached
+        conversion output instead of re-running the conversion.
         """
         try:
+            if file_hash:
+                cached = self.get_cached_stl(file_hash)
+                if cached is not None:
+                    return str(cached)
+
             input_path = Path(input_file_path)
             file_extension = input_path.suffix.lower()
-            
+
             if output_dir is None:
                 output_dir = self.temp_dir
             else:
                 output_dir = Path(output_dir)
                 output_dir.mkdir(exist_ok=True)
-            
-            output_filename = f"{input_path.stem}_converted.stl"
+
+            output_filename = f"{file_hash}.stl" if file_hash else f"{input_path.stem}_converted.stl"
             output_path = output_dir / output_filename
             
             # Handle different input formats
             if file_extension in {'.step', '.stp'}:
-                mesh = await self._convert_step_to_mesh(input_file_path)
+                mesh = self._convert_step_to_mesh(input_file_path)
             elif file_extension in {'.iges', '.igs'}:
-                mesh = await self._convert_iges_to_mesh(input_file_path)
+                mesh = self._convert_iges_to_mesh(input_file_path)
             elif file_extension == '.3mf':
-                mesh = await self._convert_3mf_to_mesh(input_file_path)
+                mesh = self._convert_3mf_to_mesh(input_file_path)
             elif file_extension in {'.obj', '.ply'}:
                 # These can be loaded directly by trimesh
                 mesh = trimesh.load_mesh(input_file_path)
@@ -54,54 +117,56 @@ class FileConverter:
             
             # Handle scene objects
             if isinstance(mesh, trimesh.Scene):
-                # Combine all geometries in the scene
-                meshes = [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
-                if meshes:
-                    mesh = trimesh.util.concatenate(meshes)
-                else:
+                # Export the scene directly: the STL writer iterates the
+                # geometries itself, so there is no need to concatenate all
+                # vertex/face arrays into one big copy first
+                if not any(isinstance(geom, trimesh.Trimesh) for geom in mesh.geometry.values()):
                     raise ValueError("No valid meshes found in scene")
-            
-            # Ensure we have a valid mesh
-            if not isinstance(mesh, trimesh.Trimesh):
-                raise ValueError("Converted object is not a valid mesh")
-            
-            # Clean up the mesh
-            mesh.remove_duplicate_faces()
-            mesh.remove_degenerate_faces()
-            
-            # Export to STL
-            mesh.export(str(output_path))
+                mesh.export(str(output_path), file_type='stl')
+            else:
+                # Ensure we have a valid mesh
+                if not isinstance(mesh, trimesh.Trimesh):
+                    raise ValueError("Converted object is not a valid mesh")
+
+                # Clean up the mesh: drop degenerate and duplicate faces in a
+                # single vectorized pass (the remove_* helpers are deprecated)
+                mesh.update_faces(mesh.nondegenerate_faces() & mesh.unique_faces())
+
+                # Export to STL with the vectorized binary writer
+                _write_binary_stl(mesh, output_path)
             
             if output_path.exists():
-                print(f"Successfully converted {input_path.name} to STL")
+                if file_hash:
+                    self._stl_cache[file_hash] = output_path
+                logger.debug("Successfully converted %s to STL", input_path.name)
                 return str(output_path)
             else:
                 raise ValueError("STL file was not created")
                 
-        except Exception as e:
-            print(f"Error converting file to STL: {e}")
+        except Exception:
+            logger.exception("Error converting file to STL")
             return None
     
-    async def _convert_step_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _convert_step_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
         Convert STEP file to mesh (requires pythonOCC or FreeCAD)
         For now, this is a placeholder that returns None
         """
-        print("STEP conversion not implemented - requires pythonOCC-core")
+        logger.warning("STEP conversion not implemented - requires pythonOCC-core")
         # TODO: Implement STEP conversion using pythonOCC-core
         # This requires complex installation and setup
         return None
     
-    async def _convert_iges_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _convert_iges_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
         Convert IGES file to mesh (requires pythonOCC or FreeCAD)
         For now, this is a placeholder that returns None
         """
-        print("IGES conversion not implemented - requires pythonOCC-core")
+        logger.warning("IGES conversion not implemented - requires pythonOCC-core")
         # TODO: Implement IGES conversion using pythonOCC-core
         return None
     
-    async def _convert_3mf_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _convert_3mf_to_mesh(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
         Convert 3MF file to mesh
         """
@@ -109,24 +174,22 @@ class FileConverter:
             # Try to load with trimesh (it has some 3MF support)
             mesh = trimesh.load_mesh(file_path)
             return mesh
-        except Exception as e:
-            print(f"Error converting 3MF file: {e}")
+        except Exception:
+            logger.exception("Error converting 3MF file")
             return None
     
-    async def convert_to_obj(self, input_file_path: str, output_dir: Optional[str] = None) -> Optional[str]:
+    def convert_to_obj(self, input_file_path: str, output_dir: Optional[str] = None) -> Optional[str]:
         """
         Convert various formats to OBJ
         """
         try:
             mesh = trimesh.load_mesh(input_file_path)
-            
+
             if isinstance(mesh, trimesh.Scene):
-                meshes = [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
-                if meshes:
-                    mesh = trimesh.util.concatenate(meshes)
-                else:
+                # Scenes export directly; no concatenated copy needed
+                if not any(isinstance(geom, trimesh.Trimesh) for geom in mesh.geometry.values()):
                     return None
-            
+
             if output_dir is None:
                 output_dir = self.temp_dir
             else:
@@ -144,8 +207,8 @@ class FileConverter:
             else:
                 return None
                 
-        except Exception as e:
-            print(f"Error converting to OBJ: {e}")
+        except Exception:
+            logger.exception("Error converting to OBJ")
             return None
     
     def cleanup_temp_files(self, max_age_hours: int = 24):
@@ -156,16 +219,19 @@ class FileConverter:
             import time
             current_time = time.time()
             max_age_seconds = max_age_hours * 3600
-            
-            for file_path in self.temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > max_age_seconds:
-                        file_path.unlink()
-                        print(f"Cleaned up old temp file: {file_path.name}")
+
+            # scandir caches stat results on the DirEntry, so each file costs
+            # one syscall instead of the two from glob + stat
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if current_time - entry.stat().st_mtime > max_age_seconds:
+                        os.unlink(entry.path)
+                        logger.debug("Cleaned up old temp file: %s", entry.name)
                         
-        except Exception as e:
-            print(f"Error cleaning up temp files: {e}")
+        except Exception:
+            logger.exception("Error cleaning up temp files")
     
     def get_supported_formats(self) -> Dict[str, str]:
         """
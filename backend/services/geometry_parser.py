@@ -1,20 +1,89 @@
 import trimesh
 import numpy as np
 from pathlib import Path
+from collections import OrderedDict
 import tempfile
 import os
+import struct
 from typing import Dict, Any, Optional
 import time
 from stl import mesh as stl_mesh
+import math
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import open3d as o3d
+    OPEN3D_AVAILABLE = True
+except ImportError:
+    OPEN3D_AVAILABLE = False
 
 from models.response_models import GeometryAnalysis, BoundingBox
 
+# Meshes above this face count use the numba kernel when available; below
+# it the NumPy path wins because of JIT dispatch overhead
+_NUMBA_FACE_THRESHOLD = 500_000
+
+# Binary STL triangle record: normal, three vertices, attribute byte count
+_BINARY_STL_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2"),
+])
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mesh_stats(vertices, faces):
+        """
+        Accumulate signed volume and surface area in one streaming pass.
+
+        Avoids the (F, 3, 3) gather and cross-product temporaries of the
+        NumPy path — everything stays in registers, parallelized over faces.
+        """
+        volume = 0.0
+        area = 0.0
+        for i in prange(faces.shape[0]):
+            a, b, c = faces[i, 0], faces[i, 1], faces[i, 2]
+            ax, ay, az = vertices[a, 0], vertices[a, 1], vertices[a, 2]
+            e1x = vertices[b, 0] - ax
+            e1y = vertices[b, 1] - ay
+            e1z = vertices[b, 2] - az
+            e2x = vertices[c, 0] - ax
+            e2y = vertices[c, 1] - ay
+            e2z = vertices[c, 2] - az
+            cx = e1y * e2z - e1z * e2y
+            cy = e1z * e2x - e1x * e2z
+            cz = e1x * e2y - e1y * e2x
+            area += 0.5 * math.sqrt(cx * cx + cy * cy + cz * cz)
+            volume += (ax * cx + ay * cy + az * cz) / 6.0
+        return volume, area
+
+# Process-local parser used by pool workers, constructed lazily per process
+_worker_parser: Optional["GeometryParser"] = None
+
+def analyze_file_worker(file_path: str, filename: str) -> GeometryAnalysis:
+    """Process-pool entry point: parse and analyze a file in a worker process"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = GeometryParser()
+    return _worker_parser.analyze_file(file_path, filename)
+
 class GeometryParser:
     """
     Service for parsing and analyzing 3D geometry files
     """
     
+    # Maximum number of analyses kept in the hash-keyed memo cache
+    ANALYSIS_CACHE_SIZE = 512
+
     def __init__(self):
+        # Analyses are a pure function of file content, so identical uploads
+        # can be served from an LRU cache keyed by content hash
+        self._analysis_cache: OrderedDict[bytes, GeometryAnalysis] = OrderedDict()
         self.supported_formats = {
             '.stl': self._parse_stl,
             '.obj': self._parse_obj,
@@ -26,7 +95,21 @@ class GeometryParser:
             # '.igs': self._parse_iges,
         }
     
-    async def analyze_file(self, file_path: str, filename: str) -> GeometryAnalysis:
+    def get_cached_analysis(self, file_hash: bytes) -> Optional[GeometryAnalysis]:
+        """Return a previously computed analysis for this content hash, if any"""
+        analysis = self._analysis_cache.get(file_hash)
+        if analysis is not None:
+            self._analysis_cache.move_to_end(file_hash)
+        return analysis
+
+    def cache_analysis(self, file_hash: bytes, analysis: GeometryAnalysis) -> None:
+        """Store an analysis in the LRU cache, evicting the oldest entry if full"""
+        self._analysis_cache[file_hash] = analysis
+        self._analysis_cache.move_to_end(file_hash)
+        if len(self._analysis_cache) > self.ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+
+    def analyze_file(self, file_path: str, filename: str) -> GeometryAnalysis:
         """
         Analyze a 3D file and return geometry information
         """
@@ -38,7 +121,7 @@ class GeometryParser:
             raise ValueError(f"Unsupported file format: {file_extension}")
         
         # Parse the file
-        mesh_data = await self.supported_formats[file_extension](file_path)
+        mesh_data = self.supported_formats[file_extension](file_path)
         
         if mesh_data is None:
             raise ValueError("Failed to parse geometry from file")
@@ -51,12 +134,50 @@ class GeometryParser:
         
         return analysis
     
-    async def _parse_stl(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _parse_stl_binary_fast(self, file_path: str) -> Optional[trimesh.Trimesh]:
+        """
+        Parse a binary STL by memory-mapping its triangle records.
+
+        The OS page cache serves the reads and the vertex array is a
+        single contiguous view — no chunked reads or Python-level
+        record iteration. Returns None for ASCII files (or anything
+        whose record count doesn't match the file size) so the caller
+        can fall through to trimesh.
+        """
+        file_size = os.path.getsize(file_path)
+        if file_size < 84:
+            return None
+        with open(file_path, 'rb') as f:
+            header = f.read(84)
+        triangle_count = struct.unpack('<I', header[80:84])[0]
+        # The size check rejects ASCII files and truncated binaries,
+        # including the rare binary whose header starts with "solid"
+        if triangle_count == 0 or file_size != 84 + triangle_count * _BINARY_STL_DTYPE.itemsize:
+            return None
+
+        records = np.memmap(file_path, dtype=_BINARY_STL_DTYPE, mode='r',
+                            offset=84, shape=(triangle_count,))
+        flat = records["vertices"].reshape(-1, 3).astype(np.float64)
+        del records
+        # Deduplicate the triangle soup exactly as the numpy-stl
+        # fallback does: view each xyz row as one opaque record
+        packed = flat.view(np.dtype((np.void, flat.dtype.itemsize * 3)))
+        _, index, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        return trimesh.Trimesh(vertices=flat[index], faces=inverse.reshape(-1, 3), process=False)
+
+    def _parse_stl(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
-        Parse STL file using trimesh
+        Parse STL file, trying the memory-mapped binary path before trimesh
         """
         try:
-            mesh = trimesh.load_mesh(file_path)
+            mesh = self._parse_stl_binary_fast(file_path)
+            if mesh is not None:
+                return mesh
+        except Exception as e:
+            print(f"Binary STL fast path failed, falling back to trimesh: {e}")
+
+        try:
+            mesh = trimesh.load_mesh(file_path, process=False)
             if isinstance(mesh, trimesh.Scene):
                 # If it's a scene, get the first mesh
                 mesh = list(mesh.geometry.values())[0]
@@ -66,19 +187,37 @@ class GeometryParser:
             # Try with numpy-stl as fallback
             try:
                 stl_data = stl_mesh.Mesh.from_file(file_path)
-                vertices = stl_data.vectors.reshape(-1, 3)
-                faces = np.arange(len(vertices)).reshape(-1, 3)
-                return trimesh.Trimesh(vertices=vertices, faces=faces)
+                vecs = stl_data.vectors
+                # Drop the numpy-stl wrapper (and its normals/attributes
+                # arrays) before deduplicating, so only one copy of the
+                # triangle soup is resident at peak
+                del stl_data
+                flat = vecs.reshape(-1, 3).astype(np.float64)
+                # vecs is a view into numpy-stl's structured record array;
+                # releasing it lets the whole float32 buffer go now that the
+                # float64 copy exists
+                del vecs
+                # STL stores each triangle's vertices independently, so the
+                # flat array holds 3N mostly-duplicate rows. Deduplicate in
+                # one vectorized pass by viewing each xyz row as an opaque
+                # record that np.unique can compare whole
+                packed = np.ascontiguousarray(flat).view(
+                    np.dtype((np.void, flat.dtype.itemsize * 3))
+                )
+                _, index, inverse = np.unique(packed, return_index=True, return_inverse=True)
+                vertices = flat[index]
+                faces = inverse.reshape(-1, 3)
+                return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
             except Exception as e2:
                 print(f"Fallback STL parsing also failed: {e2}")
                 return None
     
-    async def _parse_obj(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _parse_obj(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
         Parse OBJ file using trimesh
         """
         try:
-            mesh = trimesh.load_mesh(file_path)
+            mesh = trimesh.load_mesh(file_path, process=False)
             if isinstance(mesh, trimesh.Scene):
                 mesh = list(mesh.geometry.values())[0]
             return mesh
@@ -86,12 +225,29 @@ class GeometryParser:
             print(f"Error parsing OBJ file: {e}")
             return None
     
-    async def _parse_ply(self, file_path: str) -> Optional[trimesh.Trimesh]:
+    def _parse_ply(self, file_path: str) -> Optional[trimesh.Trimesh]:
         """
-        Parse PLY file using trimesh
+        Parse PLY file, routing binary files through open3d's C++ reader
+        when available and falling back to trimesh
         """
+        if OPEN3D_AVAILABLE:
+            try:
+                # Sniff the header: the format line sits in the first block
+                with open(file_path, 'rb') as f:
+                    header = f.read(1024)
+                if b'format binary_little_endian' in header or b'format binary_big_endian' in header:
+                    o3d_mesh = o3d.io.read_triangle_mesh(file_path)
+                    if len(o3d_mesh.triangles) > 0:
+                        return trimesh.Trimesh(
+                            vertices=np.asarray(o3d_mesh.vertices),
+                            faces=np.asarray(o3d_mesh.triangles),
+                            process=False
+                        )
+            except Exception as e:
+                print(f"open3d PLY fast path failed, falling back to trimesh: {e}")
+
         try:
-            mesh = trimesh.load_mesh(file_path)
+            mesh = trimesh.load_mesh(file_path, process=False)
             if isinstance(mesh, trimesh.Scene):
                 mesh = list(mesh.geometry.values())[0]
             return mesh
@@ -104,39 +260,54 @@ class GeometryParser:
         Analyze mesh geometry and return structured data
         """
         try:
-            # Check if mesh is valid and attempt to fix common issues
-            try:
-                # Try to access volume to check if mesh is valid
-                _ = mesh.volume
-            except:
+            # process=False loads STL triangle soups with every vertex
+            # duplicated per face, so shared edges are never detected and the
+            # mesh can't be watertight (which would zero the volume below).
+            # Merge first; only run the heavier repairs if it still isn't
+            # closed.
+            if not mesh.is_watertight:
+                mesh.merge_vertices()
+            if not mesh.is_watertight:
                 print("Mesh has issues, attempting to fix...")
                 mesh.fix_normals()
-                mesh.remove_duplicate_faces()
-                mesh.remove_degenerate_faces()
+                mesh.update_faces(mesh.nondegenerate_faces() & mesh.unique_faces())
             
+            # One vectorized pass over the faces: a single gather and cross
+            # product yields both the signed tetrahedron volumes and the
+            # triangle areas, instead of trimesh's separate traversals for
+            # mesh.volume and mesh.area. Very large meshes dispatch to the
+            # numba kernel, which skips the gather temporaries entirely.
+            if NUMBA_AVAILABLE and len(mesh.faces) > _NUMBA_FACE_THRESHOLD:
+                signed_volume_mm3, surface_area_mm2 = _mesh_stats(
+                    np.asarray(mesh.vertices, dtype=np.float64),
+                    np.asarray(mesh.faces, dtype=np.int64)
+                )
+            else:
+                triangles = mesh.vertices[mesh.faces]  # (F, 3, 3)
+                v0, v1, v2 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+                cross = np.cross(v1 - v0, v2 - v0)
+                surface_area_mm2 = 0.5 * np.linalg.norm(cross, axis=1).sum()
+                signed_volume_mm3 = np.einsum('ij,ij->i', v0, cross).sum() / 6.0
+
             # Calculate volume (convert from mm³ to cm³)
-            volume_mm3 = abs(mesh.volume) if mesh.is_volume else 0
+            volume_mm3 = abs(signed_volume_mm3) if mesh.is_volume else 0
             volume_cm3 = volume_mm3 / 1000  # mm³ to cm³
-            
+
             # Calculate surface area (convert from mm² to cm²)
-            surface_area_mm2 = mesh.area
             surface_area_cm2 = surface_area_mm2 / 100  # mm² to cm²
-            
-            # Get bounding box
-            bounds = mesh.bounds
-            min_bound = bounds[0]
-            max_bound = bounds[1]
-            
+
+            # Get bounding box: unpack min/max once and let tolist() do the
+            # numpy-to-float conversion in one call per row
+            lo = mesh.vertices.min(axis=0)
+            hi = mesh.vertices.max(axis=0)
+            min_x, min_y, min_z = lo.tolist()
+            max_x, max_y, max_z = hi.tolist()
+            width, height, depth = (hi - lo).tolist()
+
             bounding_box = BoundingBox(
-                min_x=float(min_bound[0]),
-                min_y=float(min_bound[1]),
-                min_z=float(min_bound[2]),
-                max_x=float(max_bound[0]),
-                max_y=float(max_bound[1]),
-                max_z=float(max_bound[2]),
-                width=float(max_bound[0] - min_bound[0]),
-                height=float(max_bound[1] - min_bound[1]),
-                depth=float(max_bound[2] - min_bound[2])
+                min_x=min_x, min_y=min_y, min_z=min_z,
+                max_x=max_x, max_y=max_y, max_z=max_z,
+                width=width, height=height, depth=depth
             )
             
             # Check mesh properties
@@ -3,7 +3,12 @@ import asyncio
 import shutil
 import hashlib
 import json
-from datetime import datetime, timedelta
+import mmap
+import tempfile
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, BinaryIO, Dict, Set
 from uuid import uuid4
@@ -12,26 +17,99 @@ import logging
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.exceptions import ClientError
     S3_AVAILABLE = True
 except ImportError:
     S3_AVAILABLE = False
     boto3 = None
+    TransferConfig = None
     ClientError = Exception
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    blake3 = None
+
 from config.storage import storage_config, StorageType
 
 logger = logging.getLogger(__name__)
 
+def _use_blake3() -> bool:
+    """Duplicate detection doesn't need a cryptographic hash, so BLAKE3 is the
+    default; FILE_HASH_ALGORITHM=sha256 forces SHA-256 for compliance setups"""
+    return BLAKE3_AVAILABLE and storage_config.file_hash_algorithm != "sha256"
+
+# Hashes are tracked internally as raw bytes truncated to 16 — still
+# collision-free for any plausible file count, at a quarter of the RAM a
+# 64-char hex string costs. Call .hex() only where a string is needed
+# (API responses, filenames, JSON keys).
+HASH_SIZE = 16
+
+def hash_file(file_path) -> bytes:
+    """
+    Hash a file on disk for duplicate detection.
+
+    Memory-maps the file and feeds it to BLAKE3 when available (SIMD tree
+    hashing across all cores), falling back to SHA-256 over the same mmap.
+    Returns the truncated raw digest (HASH_SIZE bytes).
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if _use_blake3():
+                    return blake3.blake3(mm, max_threads=blake3.blake3.AUTO).digest()[:HASH_SIZE]
+                return hashlib.sha256(mm).digest()[:HASH_SIZE]
+        except ValueError:
+            # mmap rejects zero-length files
+            hasher = blake3.blake3() if _use_blake3() else hashlib.sha256()
+            return hasher.digest()[:HASH_SIZE]
+
+@dataclass
+class SessionState:
+    """Per-session duplicate-tracking state"""
+    hashes: Set[bytes] = field(default_factory=set)
+    name_to_hash: Dict[str, bytes] = field(default_factory=dict)
+    last_seen: float = field(default_factory=time.time)
+
 class StorageService:
+    # Upper bound on concurrently tracked sessions; least-recently-used
+    # entries are evicted so abandoned carts can't grow memory forever
+    MAX_SESSIONS = 10_000
+
+    # Upper bound on persisted analyses; keeps the sidecar rewrite O(1)
+    # in upload count rather than growing without limit
+    ANALYSIS_STORE_SIZE = 4096
+
     def __init__(self):
         self.config = storage_config
         self._s3_client = None
-        # Track file hashes per session to detect duplicates
-        self._session_file_hashes: Dict[str, Set[str]] = {}
-        # Track filename-hash mapping per session to handle same name different content
-        self._session_filename_hashes: Dict[str, Dict[str, str]] = {}
+        # Per-session duplicate tracking: one SessionState per session in an
+        # LRU-ordered map, expired alongside the files (auto_delete_hours)
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        # Per-session locks so concurrent uploads from the same session
+        # can't race the check-then-save window; different sessions never
+        # block each other
+        self._session_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         
+        # Persistent content-hash -> analysis sidecar so re-uploads of a
+        # known file can skip the parsing pipeline entirely. Lives next to
+        # the upload dir, not inside it — /download serves everything in
+        # local_upload_dir by name.
+        self._analysis_store_path: Optional[Path] = None
+        self._analysis_store: OrderedDict[str, dict] = OrderedDict()
+        if self.config.is_local_storage():
+            self._analysis_store_path = self.config.local_upload_dir.parent / "analysis_cache.json"
+            if self._analysis_store_path.exists():
+                try:
+                    self._analysis_store = OrderedDict(json.loads(self._analysis_store_path.read_text()))
+                    while len(self._analysis_store) > self.ANALYSIS_STORE_SIZE:
+                        self._analysis_store.popitem(last=False)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load analysis cache: {e}")
+
         if self.config.is_s3_storage():
             if not S3_AVAILABLE:
                 raise ImportError("boto3 is required for S3 storage. Install with: pip install boto3")
@@ -47,6 +125,14 @@ class StorageService:
             aws_access_key_id=self.config.aws_access_key_id,
             aws_secret_access_key=self.config.aws_secret_access_key
         )
+        # Multipart transfer settings: objects above the threshold are
+        # uploaded/downloaded as parallel part transfers
+        self._transfer_config = TransferConfig(
+            multipart_threshold=128 * 1024 * 1024,
+            multipart_chunksize=128 * 1024 * 1024,
+            max_concurrency=8,
+            use_threads=True
+        )
     
     def _generate_unique_filename(self, original_filename: str) -> str:
         """Generate a unique filename to avoid conflicts"""
@@ -55,142 +141,307 @@ class StorageService:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return f"{timestamp}_{unique_id}{file_extension}"
     
-    def _calculate_file_hash(self, file_content: BinaryIO) -> str:
-        """Calculate SHA256 hash of file content"""
+    def _calculate_file_hash(self, file_content: BinaryIO) -> bytes:
+        """Calculate content hash of file data (BLAKE3 when available, else SHA-256)"""
         file_content.seek(0)
-        hash_sha256 = hashlib.sha256()
-        for chunk in iter(lambda: file_content.read(4096), b""):
-            hash_sha256.update(chunk)
+        if _use_blake3():
+            hasher = blake3.blake3()
+            # readinto a reusable buffer: one allocation for the whole file
+            # instead of a fresh bytes object per chunk
+            buf = bytearray(1 << 20)
+            mv = memoryview(buf)
+            while (n := file_content.readinto(mv)):
+                hasher.update(mv[:n])
+            digest = hasher.digest()[:HASH_SIZE]
+        elif hasattr(hashlib, "file_digest"):
+            # file_digest loops in C, releases the GIL and takes OpenSSL's
+            # hardware SHA path, unlike a Python read/update loop
+            digest = hashlib.file_digest(file_content, 'sha256').digest()[:HASH_SIZE]
+        else:
+            # Python < 3.11: chunked readinto loop with a reusable buffer
+            hasher = hashlib.sha256()
+            buf = bytearray(1 << 20)
+            mv = memoryview(buf)
+            while (n := file_content.readinto(mv)):
+                hasher.update(mv[:n])
+            digest = hasher.digest()[:HASH_SIZE]
         file_content.seek(0)  # Reset position for later use
-        return hash_sha256.hexdigest()
+        return digest
     
-    def is_duplicate_in_session(self, session_id: str, file_hash: str, filename: str) -> tuple[bool, bool]:
+    def get_cached_analysis(self, file_hash: bytes) -> Optional[dict]:
+        """Return the persisted analysis dict for this content hash, if any"""
+        analysis = self._analysis_store.get(file_hash.hex())
+        if analysis is not None:
+            self._analysis_store.move_to_end(file_hash.hex())
+        return analysis
+
+    async def store_analysis(self, file_hash: bytes, analysis: dict) -> None:
+        """Persist an analysis result keyed by content hash"""
+        self._analysis_store[file_hash.hex()] = analysis
+        while len(self._analysis_store) > self.ANALYSIS_STORE_SIZE:
+            self._analysis_store.popitem(last=False)
+        if self._analysis_store_path is not None:
+            # Serialize on the loop (cheap, and dict mutation stays
+            # single-threaded), write and swap in a worker thread
+            payload = json.dumps(self._analysis_store)
+            try:
+                await asyncio.to_thread(self._write_analysis_store, payload)
+            except OSError as e:
+                logger.error(f"Failed to persist analysis cache: {e}")
+
+    def _write_analysis_store(self, payload: str) -> None:
+        """Replace the sidecar atomically so a crash mid-write can't corrupt it.
+
+        Each writer gets its own temp file: concurrent stores then race
+        only on the final os.replace, which is atomic, so the sidecar
+        always holds one writer's complete JSON.
+        """
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self._analysis_store_path.parent, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._analysis_store_path)
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _discard_session_lock(self, session_id: str) -> None:
+        """Drop a dropped session's lock so the lock map stays bounded too.
+
+        A lock that's currently held is kept — popping it would let a
+        concurrent request mint a fresh one and defeat the mutual
+        exclusion; the holder's session is being recreated anyway.
+        """
+        lock = self._session_locks.get(session_id)
+        if lock is not None and not lock.locked():
+            del self._session_locks[session_id]
+
+    def _get_session(self, session_id: str, create: bool = False) -> Optional[SessionState]:
+        """Look up session state, refreshing LRU order and expiring stale entries"""
+        state = self._sessions.get(session_id)
+        if state is not None:
+            if time.time() - state.last_seen > self.config.auto_delete_hours * 3600:
+                del self._sessions[session_id]
+                self._discard_session_lock(session_id)
+                state = None
+            else:
+                state.last_seen = time.time()
+                self._sessions.move_to_end(session_id)
+
+        if state is None and create:
+            state = SessionState()
+            self._sessions[session_id] = state
+            if len(self._sessions) > self.MAX_SESSIONS:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                self._discard_session_lock(evicted_id)
+
+        return state
+
+    def is_duplicate_in_session(self, session_id: str, file_hash: bytes, filename: str) -> tuple[bool, bool]:
         """Check if file hash already exists in the current session
         Returns: (is_duplicate_hash, is_same_name_different_content)
         """
-        if session_id not in self._session_file_hashes:
+        state = self._get_session(session_id)
+        if state is None:
             return False, False
-        
+
         # Check if exact same file (same hash) exists
-        is_duplicate_hash = file_hash in self._session_file_hashes[session_id]
-        
+        is_duplicate_hash = file_hash in state.hashes
+
         # Check if same filename with different content exists
-        is_same_name_different_content = False
-        if session_id in self._session_filename_hashes:
-            existing_hash = self._session_filename_hashes[session_id].get(filename)
-            if existing_hash and existing_hash != file_hash:
-                is_same_name_different_content = True
-        
+        existing_hash = state.name_to_hash.get(filename)
+        is_same_name_different_content = bool(existing_hash and existing_hash != file_hash)
+
         return is_duplicate_hash, is_same_name_different_content
-    
-    def add_file_to_session(self, session_id: str, file_hash: str, filename: str) -> None:
+
+    def add_file_to_session(self, session_id: str, file_hash: bytes, filename: str) -> None:
         """Add file hash and filename to session tracking"""
-        if session_id not in self._session_file_hashes:
-            self._session_file_hashes[session_id] = set()
-        if session_id not in self._session_filename_hashes:
-            self._session_filename_hashes[session_id] = {}
-        
-        self._session_file_hashes[session_id].add(file_hash)
-        self._session_filename_hashes[session_id][filename] = file_hash
-    
+        state = self._get_session(session_id, create=True)
+        state.hashes.add(file_hash)
+        state.name_to_hash[filename] = file_hash
+
     def clear_session(self, session_id: str) -> None:
         """Clear session file tracking"""
-        if session_id in self._session_file_hashes:
-            del self._session_file_hashes[session_id]
-        if session_id in self._session_filename_hashes:
-            del self._session_filename_hashes[session_id]
-    
+        self._sessions.pop(session_id, None)
+        self._discard_session_lock(session_id)
+
     def get_session_file_count(self, session_id: str) -> int:
         """Get number of unique files uploaded in session"""
-        if session_id not in self._session_file_hashes:
-            return 0
-        return len(self._session_file_hashes[session_id])
-    
+        state = self._get_session(session_id)
+        return len(state.hashes) if state is not None else 0
+
     async def remove_file_from_session(self, session_id: str, filename: str) -> bool:
         """Remove a file from session tracking and delete the physical file"""
-        if session_id not in self._session_filename_hashes:
+        state = self._get_session(session_id)
+        if state is None:
             return False
-        
+
         # Get the file hash for this filename
-        file_hash = self._session_filename_hashes[session_id].get(filename)
+        file_hash = state.name_to_hash.get(filename)
         if not file_hash:
             return False
-        
+
         # Remove from session tracking
-        if session_id in self._session_file_hashes:
-            self._session_file_hashes[session_id].discard(file_hash)
-        
-        if session_id in self._session_filename_hashes:
-            del self._session_filename_hashes[session_id][filename]
-        
+        state.hashes.discard(file_hash)
+        del state.name_to_hash[filename]
+
         # TODO: Optionally delete the physical file from storage
         # For now, we just remove from session tracking
-        
+
         return True
     
-    async def save_file(self, file_content: BinaryIO, original_filename: str, session_id: Optional[str] = None) -> tuple[str, str, str]:
+    async def save_file(self, file_content: BinaryIO, original_filename: str, session_id: Optional[str] = None, precomputed_hash: Optional[bytes] = None) -> tuple[str, str, bytes]:
         """
         Save file to configured storage
         Returns: (stored_filename, access_url, file_hash)
         """
-        # Calculate file hash for duplicate detection
-        file_hash = self._calculate_file_hash(file_content)
-        
         unique_filename = self._generate_unique_filename(original_filename)
-        
-        if self.config.is_local_storage():
-            stored_filename, access_url = await self._save_local(file_content, unique_filename)
+
+        if self.config.is_local_storage() and precomputed_hash is None:
+            # Fused single pass: hash the bytes while writing them out
+            stored_filename, access_url, file_hash = await self._save_local_hashing(file_content, unique_filename)
         else:
-            stored_filename, access_url = await self._save_s3(file_content, unique_filename)
-        
+            file_hash = precomputed_hash or self._calculate_file_hash(file_content)
+            if self.config.is_local_storage():
+                stored_filename, access_url = await self._save_local(file_content, unique_filename)
+            else:
+                stored_filename, access_url = await self._save_s3(file_content, unique_filename)
+
         # Track file in session if session_id provided
         if session_id:
             self.add_file_to_session(session_id, file_hash, original_filename)
-        
+
         return stored_filename, access_url, file_hash
     
-    async def save_file_with_duplicate_check(self, file_content: BinaryIO, original_filename: str, session_id: str) -> tuple[bool, bool, Optional[str], Optional[str], str]:
+    async def save_file_with_duplicate_check(self, file_content: BinaryIO, original_filename: str, session_id: str) -> tuple[bool, bool, Optional[str], Optional[str], bytes]:
         """
         Save file with duplicate detection
         Returns: (is_duplicate_hash, is_same_name_different_content, stored_filename, access_url, file_hash)
         """
         # Calculate file hash
         file_hash = self._calculate_file_hash(file_content)
-        
-        # Check if this file already exists in the session
-        is_duplicate_hash, is_same_name_different_content = self.is_duplicate_in_session(session_id, file_hash, original_filename)
-        
-        if is_duplicate_hash:
-            return True, False, None, None, file_hash
-        
-        if is_same_name_different_content:
-            return False, True, None, None, file_hash
-        
-        # File is not a duplicate, save it
-        stored_filename, access_url, _ = await self.save_file(file_content, original_filename, session_id)
-        
+
+        async with self._session_locks[session_id]:
+            # Check if this file already exists in the session
+            is_duplicate_hash, is_same_name_different_content = self.is_duplicate_in_session(session_id, file_hash, original_filename)
+
+            if is_duplicate_hash:
+                return True, False, None, None, file_hash
+
+            if is_same_name_different_content:
+                return False, True, None, None, file_hash
+
+            # File is not a duplicate, save it (hash already computed above)
+            stored_filename, access_url, _ = await self.save_file(file_content, original_filename, session_id, precomputed_hash=file_hash)
+
         return False, False, stored_filename, access_url, file_hash
     
-    async def _save_local(self, file_content: BinaryIO, filename: str) -> tuple[str, str]:
-        """Save file to local storage"""
+    async def save_file_from_path(self, file_path: str, original_filename: str, file_hash: bytes, session_id: Optional[str] = None) -> tuple[str, str]:
+        """
+        Save an already-written temp file to configured storage using a precomputed hash
+        Returns: (stored_filename, access_url)
+        """
+        unique_filename = self._generate_unique_filename(original_filename)
+
+        if self.config.is_local_storage():
+            stored_filename, access_url = await self._save_local_from_path(file_path, unique_filename)
+        else:
+            stored_filename, access_url = await self._save_s3_from_path(file_path, unique_filename)
+
+        # Track file in session if session_id provided
+        if session_id:
+            self.add_file_to_session(session_id, file_hash, original_filename)
+
+        return stored_filename, access_url
+
+    async def save_file_from_path_with_duplicate_check(self, file_path: str, original_filename: str, file_hash: bytes, session_id: str) -> tuple[bool, bool, Optional[str], Optional[str]]:
+        """
+        Save an already-written temp file with duplicate detection, reusing a precomputed hash
+        Returns: (is_duplicate_hash, is_same_name_different_content, stored_filename, access_url)
+        """
+        async with self._session_locks[session_id]:
+            # Check if this file already exists in the session
+            is_duplicate_hash, is_same_name_different_content = self.is_duplicate_in_session(session_id, file_hash, original_filename)
+
+            if is_duplicate_hash:
+                return True, False, None, None
+
+            if is_same_name_different_content:
+                return False, True, None, None
+
+            # File is not a duplicate, save it
+            stored_filename, access_url = await self.save_file_from_path(file_path, original_filename, file_hash, session_id)
+
+        return False, False, stored_filename, access_url
+
+    async def _save_local_from_path(self, src_path: str, filename: str) -> tuple[str, str]:
+        """Publish an existing temp file into local storage without re-reading it"""
         file_path = self.config.local_upload_dir / filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            file_content.seek(0)
-            await f.write(file_content.read())
-        
-        # Create metadata file for cleanup
+
+        try:
+            # Same-filesystem hard link: zero bytes moved, and the temp path
+            # stays valid for the geometry pipeline until its own cleanup
+            os.link(src_path, file_path)
+        except OSError:
+            # Cross-device (e.g. /tmp on tmpfs): fall back to a chunked copy
+            async with aiofiles.open(src_path, 'rb') as src, aiofiles.open(file_path, 'wb') as dst:
+                while chunk := await src.read(1 << 20):
+                    await dst.write(chunk)
+
+        await self._write_metadata(filename)
+
+        access_url = f"/download/{filename}"
+        return filename, access_url
+
+    async def _save_s3_from_path(self, src_path: str, filename: str) -> tuple[str, str]:
+        """Save an existing temp file to S3 storage"""
+        with open(src_path, 'rb') as f:
+            return await self._save_s3(f, filename)
+
+    async def _write_metadata(self, filename: str) -> None:
+        """Create metadata sidecar file used by cleanup"""
         metadata_path = self.config.local_upload_dir / f"{filename}.meta"
         metadata = {
-            "upload_time": datetime.now().isoformat(),
+            # Epoch float: cleanup compares numbers instead of parsing ISO strings
+            "upload_time": time.time(),
             "original_filename": filename
         }
-        
+
         async with aiofiles.open(metadata_path, 'w') as f:
-            import json
             await f.write(json.dumps(metadata))
+
+    async def _save_local_hashing(self, file_content: BinaryIO, filename: str) -> tuple[str, str, bytes]:
+        """Save file to local storage, hashing the bytes in the same pass"""
+        file_path = self.config.local_upload_dir / filename
+        hasher = blake3.blake3() if _use_blake3() else hashlib.sha256()
+
+        file_content.seek(0)
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := file_content.read(1 << 20):
+                hasher.update(chunk)
+                await f.write(chunk)
+
+        await self._write_metadata(filename)
+
+        access_url = f"/download/{filename}"
+        return filename, access_url, hasher.digest()[:HASH_SIZE]
+
+    async def _save_local(self, file_content: BinaryIO, filename: str) -> tuple[str, str]:
+        """Save file to local storage"""
+        file_path = self.config.local_upload_dir / filename
         
+        # Stream in 1 MiB chunks: memory stays bounded and the event loop
+        # keeps turning while the payload is flushed to disk
+        file_content.seek(0)
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := file_content.read(1 << 20):
+                await f.write(chunk)
+        
+        # Create metadata file for cleanup
+        await self._write_metadata(filename)
+
         access_url = f"/download/{filename}"
         return filename, access_url
     
@@ -198,9 +449,11 @@ class StorageService:
         """Save file to S3 storage"""
         try:
             file_content.seek(0)
-            
-            # Upload to S3
-            self._s3_client.upload_fileobj(
+
+            # Upload to S3. boto3 is synchronous, so run it in a worker
+            # thread rather than blocking the event loop for the transfer
+            await asyncio.to_thread(
+                self._s3_client.upload_fileobj,
                 file_content,
                 self.config.s3_bucket_name,
                 filename,
@@ -209,7 +462,8 @@ class StorageService:
                         'upload_time': datetime.now().isoformat(),
                         'auto_delete_hours': str(self.config.auto_delete_hours)
                     }
-                }
+                },
+                Config=self._transfer_config
             )
             
             # Generate presigned URL for access
@@ -231,8 +485,24 @@ class StorageService:
             file_path = self.config.local_upload_dir / filename
             return file_path if file_path.exists() else None
         else:
-            # For S3, we would need to download the file temporarily
-            # This is a simplified implementation
+            return await self._download_s3_to_temp(filename)
+
+    async def _download_s3_to_temp(self, filename: str) -> Optional[Path]:
+        """Download an S3 object to a local temp file using parallel part transfers"""
+        import tempfile
+        temp_path = Path(tempfile.gettempdir()) / filename
+        try:
+            with open(temp_path, 'wb') as f:
+                await asyncio.to_thread(
+                    self._s3_client.download_fileobj,
+                    self.config.s3_bucket_name,
+                    filename,
+                    f,
+                    Config=self._transfer_config
+                )
+            return temp_path
+        except ClientError as e:
+            logger.error(f"Failed to download S3 file {filename}: {e}")
             return None
     
     async def delete_file(self, filename: str) -> bool:
@@ -248,11 +518,9 @@ class StorageService:
             file_path = self.config.local_upload_dir / filename
             metadata_path = self.config.local_upload_dir / f"{filename}.meta"
             
-            if file_path.exists():
-                file_path.unlink()
-            if metadata_path.exists():
-                metadata_path.unlink()
-            
+            file_path.unlink(missing_ok=True)
+            metadata_path.unlink(missing_ok=True)
+
             return True
         except Exception as e:
             logger.error(f"Failed to delete local file {filename}: {e}")
@@ -261,7 +529,8 @@ class StorageService:
     async def _delete_s3(self, filename: str) -> bool:
         """Delete file from S3 storage"""
         try:
-            self._s3_client.delete_object(
+            await asyncio.to_thread(
+                self._s3_client.delete_object,
                 Bucket=self.config.s3_bucket_name,
                 Key=filename
             )
@@ -279,17 +548,19 @@ class StorageService:
     
     async def _cleanup_local_files(self):
         """Clean up old local files"""
-        cutoff_time = datetime.now() - timedelta(hours=self.config.auto_delete_hours)
-        
+        cutoff_epoch = time.time() - self.config.auto_delete_hours * 3600
+
         for metadata_file in self.config.local_upload_dir.glob("*.meta"):
             try:
                 async with aiofiles.open(metadata_file, 'r') as f:
-                    import json
                     metadata = json.loads(await f.read())
-                
-                upload_time = datetime.fromisoformat(metadata['upload_time'])
-                
-                if upload_time < cutoff_time:
+
+                upload_time = metadata['upload_time']
+                if isinstance(upload_time, str):
+                    # Metadata written before timestamps were stored as epoch floats
+                    upload_time = datetime.fromisoformat(upload_time).timestamp()
+
+                if upload_time < cutoff_epoch:
                     # Delete both the file and metadata
                     filename = metadata_file.stem  # Remove .meta extension
                     await self._delete_local(filename)
@@ -301,24 +572,34 @@ class StorageService:
     async def _cleanup_s3_files(self):
         """Clean up old S3 files"""
         try:
-            response = self._s3_client.list_objects_v2(Bucket=self.config.s3_bucket_name)
-            cutoff_time = datetime.now() - timedelta(hours=self.config.auto_delete_hours)
-            
-            for obj in response.get('Contents', []):
-                # Get object metadata
-                head_response = self._s3_client.head_object(
+            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.config.auto_delete_hours)
+
+            # LastModified comes back with every listing page, so expiry is
+            # decided from the listing alone — no per-object HEAD round-trips.
+            # The paginator also walks past the 1000-key first page that a
+            # bare list_objects_v2 call stops at.
+            paginator = self._s3_client.get_paginator('list_objects_v2')
+
+            def list_expired():
+                expired_keys = []
+                for page in paginator.paginate(Bucket=self.config.s3_bucket_name):
+                    for obj in page.get('Contents', []):
+                        if obj['LastModified'] < cutoff_time:
+                            expired_keys.append(obj['Key'])
+                return expired_keys
+
+            expired = await asyncio.to_thread(list_expired)
+
+            # Bulk delete in chunks of 1000 keys (the API maximum per request)
+            for i in range(0, len(expired), 1000):
+                batch = expired[i:i + 1000]
+                await asyncio.to_thread(
+                    self._s3_client.delete_objects,
                     Bucket=self.config.s3_bucket_name,
-                    Key=obj['Key']
+                    Delete={'Objects': [{'Key': key} for key in batch]}
                 )
-                
-                upload_time_str = head_response.get('Metadata', {}).get('upload_time')
-                if upload_time_str:
-                    upload_time = datetime.fromisoformat(upload_time_str)
-                    
-                    if upload_time < cutoff_time:
-                        await self._delete_s3(obj['Key'])
-                        logger.info(f"Cleaned up old S3 file: {obj['Key']}")
-                        
+                logger.info(f"Cleaned up {len(batch)} old S3 files")
+
         except ClientError as e:
             logger.error(f"Error cleaning up S3 files: {e}")
 
@@ -30,17 +30,18 @@ def setup_environment(env_type: str):
         shutil.copy2(env_file, backup_file)
         print(f"Backed up existing .env to .env.backup")
     
-    # Copy the appropriate environment file
-    shutil.copy2(source_env, env_file)
+    # Copy the appropriate environment file (bytes only; no need for the
+    # extra stat/metadata syscalls copy2 makes)
+    contents = source_env.read_bytes()
+    env_file.write_bytes(contents)
     print(f"Environment configured for {env_type}")
-    
-    # Display current configuration
+
+    # Display current configuration from the bytes already in hand
     print("\nCurrent configuration:")
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                print(f"  {line}")
+    for line in contents.decode().splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            print(f"  {line}")
     
     if env_type == "production":
         print("\n⚠️  IMPORTANT: For production with S3 storage, make sure to set:")